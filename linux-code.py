@@ -10,253 +10,536 @@ Must be run as root (sudo).
 import subprocess
 import os
 import sys
+import glob
+import logging
+import queue
+import shutil
+import signal
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from logging.handlers import QueueHandler, QueueListener
+from typing import Callable
 
 # --- Global Variables ---
-# We'll store our findings in this list
-report = []
-# We'll calculate a compliance score
-score = 0
-max_score = 0
-
-# --- Helper Function ---
-def run_command(command):
+# Progress messages from the checks. They go through a queue to a single
+# writer thread (see setup_logging), so lines from parallel checks don't mix.
+log = logging.getLogger("audit")
+
+# How long (in seconds) cached command results stay valid.
+# Discovery = "what is installed/enabled", readiness = "is it running".
+DISCOVERY_TTL = 5
+READINESS_TTL = 30
+
+SSHD_CONFIG = "/etc/ssh/sshd_config"
+
+# The rootkit scan can take minutes, so it gets its own (generous) time limit
+RKHUNTER_TIMEOUT = 600
+# How often (in seconds) to log that the rootkit scan is still running
+RKHUNTER_PROGRESS_INTERVAL = 30
+
+# rkhunter scans in progress, so main() can stop them on Ctrl-C
+running_scans = set()
+
+# Cache statistics, handy to verify that repeated commands aren't re-run
+cache_hits = 0
+cache_misses = 0
+
+# --- Logging ---
+def setup_logging():
+    """
+    Sends log records through a queue to a background thread that writes
+    them out: info to stdout, warnings and errors to stderr.
+    Returns the QueueListener; call .stop() on it to flush everything.
+    """
+    stdout_handler = logging.StreamHandler(sys.stdout)
+    stdout_handler.addFilter(lambda record: record.levelno < logging.WARNING)
+    stderr_handler = logging.StreamHandler(sys.stderr)
+    stderr_handler.setLevel(logging.WARNING)
+
+    log_queue = queue.Queue()
+    logging.basicConfig(format="%(message)s", level=logging.INFO, handlers=[QueueHandler(log_queue)])
+
+    listener = QueueListener(log_queue, stdout_handler, stderr_handler, respect_handler_level=True)
+    listener.start()
+    return listener
+
+# --- Audit State ---
+@dataclass
+class AuditState:
+    """Collects report items and the compliance score for one audit run."""
+    report: list = field(default_factory=list)
+    score: int = 0
+    max_score: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add_report(self, item):
+        """Adds one finding to the report."""
+        with self._lock:
+            self.report.append(item)
+
+    def add_score(self, gained, max_):
+        """Adds points gained out of max_ possible points."""
+        # 'score += 1' is a read-modify-write, so it needs the lock too
+        with self._lock:
+            self.score += gained
+            self.max_score += max_
+
+# --- Helper Functions ---
+class SubprocessCache:
     """
-    Runs a shell command and returns its stdout.
-    Returns None if the command fails.
+    Wraps subprocess.run and remembers each successful result for a few
+    seconds, keyed on the argv tuple and the run options (e.g. timeout),
+    so checks that ask the same question (e.g. about systemd) don't fork
+    the same program again.
     """
+
+    def __init__(self, ttl=DISCOVERY_TTL):
+        self.ttl = ttl
+        self._entries = {}  # (argv tuple, options) -> (timestamp, CompletedProcess)
+        self._lock = threading.Lock()  # Checks run in parallel threads
+
+    def run(self, command, ttl=None, **kwargs):
+        """Same as subprocess.run(command, **kwargs), but cached for 'ttl' seconds."""
+        global cache_hits, cache_misses
+        key = (tuple(command), tuple(sorted(kwargs.items())))
+        if ttl is None:
+            ttl = self.ttl
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < ttl:
+                cache_hits += 1
+                return entry[1]
+            cache_misses += 1
+
+        # Run outside the lock so slow commands don't block the other checks
+        result = subprocess.run(command, **kwargs)
+
+        # Don't replay a (possibly transient) failure for the whole TTL
+        if result.returncode == 0:
+            with self._lock:
+                self._entries[key] = (time.monotonic(), result)
+        return result
+
+    def invalidate(self, command=None):
+        """Forgets the cached result for 'command', or everything if None."""
+        with self._lock:
+            if command is None:
+                self._entries.clear()
+            else:
+                # Drop the command's results for every set of run options
+                argv = tuple(command)
+                for key in [key for key in self._entries if key[0] == argv]:
+                    del self._entries[key]
+
+# Shared by every run_command call
+command_cache = SubprocessCache()
+
+def run_command(command, ttl=None, timeout=30):
+    """
+    Runs a command (given as an argv list) and returns its stdout.
+    Results are cached for 'ttl' seconds (see SubprocessCache).
+    Returns None if the command fails or runs longer than 'timeout' seconds.
+    """
+    # Used in our log messages, e.g. "systemctl show ufw"
+    command_str = " ".join(command)
     try:
-        # Runs a command in the shell
-        result = subprocess.run(
+        # Runs the program directly, no /bin/sh in between
+        result = command_cache.run(
             command, 
-            shell=True, 
+            ttl=ttl,
             capture_output=True, 
             text=True, 
-            check=False,  # Don't raise error on failure
-            timeout=30    # Add a timeout for safety
+            check=False,     # Don't raise error on failure
+            timeout=timeout  # Add a timeout for safety
         )
         if result.returncode != 0:
             # If command fails, log to stderr (visible in terminal)
-            print(f"Warning: Command '{command}' failed: {result.stderr.strip()}", file=sys.stderr)
+            log.warning(f"Warning: Command '{command_str}' failed: {result.stderr.strip()}")
             return None
         return result.stdout.strip()
+    except subprocess.TimeoutExpired:
+        # subprocess.run has already killed the command at this point
+        log.warning(f"Warning: Command '{command_str}' timed out after {timeout}s")
+        return None
     except Exception as e:
-        print(f"Error running command '{command}': {e}", file=sys.stderr)
+        log.error(f"Error running command '{command_str}': {e}")
         return None
 
-# --- Audit Check Functions ---
+def find_config_line(file_path, keyword):
+    """
+    Returns the first line of a config file whose first word is 'keyword',
+    an empty string if there is none (like "grep '^keyword' file || true"),
+    or None if the file doesn't exist. Other errors (e.g. permission
+    denied) are raised, so they aren't mistaken for a missing file.
+    """
+    try:
+        # Stops reading as soon as the line is found.
+        # Stray non-UTF-8 bytes are replaced instead of failing the whole check.
+        with open(file_path, errors="replace") as f:
+            return next((line.strip() for line in f if line.split()[:1] == [keyword]), "")
+    except FileNotFoundError:
+        return None
 
-def check_firewall():
-    """Checks if ufw (Uncomplicated Firewall) is active."""
-    global score, max_score
-    max_score += 1
-    print("[*] Checking Firewall (ufw)...")
+def find_config_lines(file_path, keyword):
+    """
+    Returns every line of a config file whose first word is 'keyword'
+    (like "grep '^keyword' file"), or an empty list if the file doesn't exist.
+    """
+    try:
+        with open(file_path, errors="replace") as f:
+            return [line.strip() for line in f if line.split()[:1] == [keyword]]
+    except FileNotFoundError:
+        return []
 
-    status = run_command("systemctl is-active ufw")
+def get_unit_state(unit):
+    """
+    Returns the ActiveState of a systemd unit (e.g. 'active', 'inactive'),
+    'not-found' if the unit doesn't exist, or None if systemctl fails.
+    """
+    # One 'systemctl show' gives us both properties without a shell or grep
+    output = run_command([
+        "systemctl", "show", unit,
+        "--property=LoadState,ActiveState", "--no-pager"
+    ], ttl=READINESS_TTL)
+    if output is None:
+        return None
 
-    if status == "active":
-        report.append({
-            "check": "Firewall",
-            "status": "PASS",
-            "message": "Firewall (ufw) is active.",
-            "recommendation": "None."
-        })
-        score += 1
-    elif status == "inactive":
-        report.append({
-            "check": "Firewall",
-            "status": "FAIL",
-            "message": "Firewall (ufw) is INACTIVE.",
-            "recommendation": "Enable the firewall using 'sudo ufw enable'."
-        })
-    else:
-        # Handles 'None' from run_command or other statuses
-        report.append({
-            "check": "Firewall",
-            "status": "ERROR",
-            "message": "Could not determine ufw status. Is 'ufw' installed?",
-            "recommendation": "If this is not an Ubuntu/Debian system, you may need to check for 'firewalld'."
-        })
+    properties = dict(line.split("=", 1) for line in output.splitlines() if "=" in line)
+    if properties.get("LoadState") == "not-found":
+        return "not-found"
+    return properties.get("ActiveState")
 
-def check_ssh_config():
-    """Checks for insecure SSH 'PermitRootLogin' setting."""
-    global score, max_score
-    max_score += 1
-    print("[*] Checking SSH configuration...")
+def get_ssh_root_login():
+    """Returns the PermitRootLogin line from sshd_config, or None if the file is missing."""
+    # Opening the file is the existence check, no separate os.path.exists() needed
+    return find_config_line(SSHD_CONFIG, "PermitRootLogin")
 
-    config_file = "/etc/ssh/sshd_config"
-    
-    if not os.path.exists(config_file):
-        report.append({
-            "check": "SSH Root Login",
-            "status": "ERROR",
-            "message": f"SSH config file not found at {config_file}.",
-            "recommendation": "Ensure SSH server is installed correctly."
-        })
-        return
+def get_file_mode(file_path):
+    """Returns a file's permission bits as an int (e.g., 0o644), or None if it's missing."""
+    # A single stat() both checks that the file exists and reads its mode
+    try:
+        st = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return stat.S_IMODE(st.st_mode)
 
-    # 'grep ... || true' ensures the command doesn't fail if the string isn't found
-    config = run_command(f"grep '^PermitRootLogin' {config_file} || true")
+def get_umask_settings():
+    """Returns every 'umask' line from the system-wide shell startup files."""
+    # The default umask can be set in any of these files, even more than once
+    startup_files = ["/etc/profile", "/etc/bash.bashrc"] + sorted(glob.glob("/etc/profile.d/*.sh"))
+    settings = []
+    for file_path in startup_files:
+        settings.extend(find_config_lines(file_path, "umask"))
+    return settings
 
-    if config == "PermitRootLogin no":
-        report.append({
-            "check": "SSH Root Login",
-            "status": "PASS",
-            "message": "PermitRootLogin is set to 'no'.",
-            "recommendation": "None."
-        })
-        score += 1
-    else:
-        # This catches 'PermitRootLogin yes', 'PermitRootLogin prohibit-password', or if it's commented out
-        report.append({
-            "check": "SSH Root Login",
-            "status": "FAIL",
-            "message": f"PermitRootLogin is NOT securely set to 'no'. Found: '{config}'",
-            "recommendation": "Edit /etc/ssh/sshd_config and set 'PermitRootLogin no' and restart the SSH service."
-        })
+def umask_is_restrictive(line):
+    """
+    Returns True if a 'umask' line sets a mask of 027 or more restrictive,
+    e.g. 'umask 027', 'umask 0077' or 'umask 027  # CIS 5.4.4'.
+    """
+    # Drop any trailing comment, then expect exactly 'umask <octal>'
+    tokens = line.split("#", 1)[0].split()
+    if len(tokens) != 2 or tokens[0] != "umask":
+        return False
+    try:
+        mask = int(tokens[1], 8)
+    except ValueError:
+        return False  # e.g. symbolic 'umask u=rwx,g=rx,o='
+    return mask & 0o027 == 0o027
+
+# --- Audit Checks ---
+@dataclass
+class Check:
+    """
+    A scored pass/fail audit check, described as data instead of code.
+    'probe' gathers a value (e.g. a unit state) and 'passes' decides if it's
+    compliant. Messages can include the value as {value}, formatted by 'show'.
+    """
+    name: str
+    probe: Callable
+    passes: Callable
+    pass_msg: str
+    fail_msg: str
+    fail_rec: str
+    error_msg: str = "Could not determine the result of this check."
+    error_rec: str = "Investigate the error above."
+    is_error: Callable = lambda value: value is None
+    show: Callable = str
+
+def run_check(check):
+    """
+    Runs one audit check and returns (report_items, (points_gained, points_possible)).
+    'check' is either a Check spec or a custom check function.
+    """
+    # Informational checks that don't fit the pass/fail model are plain functions
+    if not isinstance(check, Check):
+        return check()
+
+    log.info(f"[*] Checking {check.name}...")
+    try:
+        value = check.probe()
+    except Exception as e:
+        return [{
+            "check": check.name,
+            "status": "ERROR",
+            "message": f"Could not run check: {e}",
+            "recommendation": "Investigate the error above."
+        }], (0, 1)
 
-def check_file_permissions():
-    """Checks permissions on /etc/passwd and /etc/shadow."""
-    global score, max_score
-    print("[*] Checking critical file permissions...")
+    if check.is_error(value):
+        status, message, recommendation = "ERROR", check.error_msg, check.error_rec
+    elif check.passes(value):
+        status, message, recommendation = "PASS", check.pass_msg, "None."
+    else:
+        status, message, recommendation = "FAIL", check.fail_msg, check.fail_rec
 
-    files_to_check = {
-        "/etc/passwd": "644",
-        "/etc/shadow": ["640", "600", "400"] # Allow 640 (group read) or 600/400 (root only)
+    item = {
+        "check": check.name,
+        "status": status,
+        "message": message.format(value=check.show(value)),
+        "recommendation": recommendation.format(value=check.show(value))
     }
+    return [item], (1 if status == "PASS" else 0, 1)
 
-    for file_path, expected_perms_list in files_to_check.items():
-        max_score += 1
-        if not isinstance(expected_perms_list, list):
-            expected_perms_list = [expected_perms_list] # Make it a list
-
-        if not os.path.exists(file_path):
-            report.append({
-                "check": f"Permissions: {file_path}",
-                "status": "ERROR",
-                "message": f"File not found: {file_path}.",
-                "recommendation": "This is a critical system file. Investigate immediately."
-            })
-            continue
-
-        # Get permissions in octal format (e.g., '644')
-        try:
-            perms = oct(os.stat(file_path).st_mode)[-3:]
-            
-            if perms in expected_perms_list:
-                report.append({
-                    "check": f"Permissions: {file_path}",
-                    "status": "PASS",
-                    "message": f"Permissions are {perms}.",
-                    "recommendation": "None."
-                })
-                score += 1
-            else:
-                report.append({
-                    "check": f"Permissions: {file_path}",
-                    "status": "FAIL",
-                    "message": f"Permissions are {perms} (Expected: {expected_perms_list}).",
-                    "recommendation": f"Run 'sudo chmod {expected_perms_list[0]} {file_path}'."
-                })
-        except Exception as e:
-            report.append({
-                "check": f"Permissions: {file_path}",
-                "status": "ERROR",
-                "message": f"Could not check permissions: {e}",
-                "recommendation": "Investigate file system issue."
-            })
+def permission_check(file_path, recommended_perms, expected_perms):
+    """Builds a Check that 'file_path' has one of the 'expected_perms' modes."""
+    expected = ", ".join(f"{perms:03o}" for perms in sorted(expected_perms, reverse=True))
+    return Check(
+        name=f"Permissions: {file_path}",
+        probe=lambda: get_file_mode(file_path),
+        passes=lambda perms: perms in expected_perms,
+        pass_msg="Permissions are {value}.",
+        fail_msg=f"Permissions are {{value}} (Expected: {expected}).",
+        fail_rec=f"Run 'sudo chmod {recommended_perms:03o} {file_path}'.",
+        error_msg=f"File not found: {file_path}.",
+        error_rec="This is a critical system file. Investigate immediately.",
+        show=lambda perms: f"{perms:03o}" if perms is not None else ""
+    )
 
 def check_unused_services():
     """Lists enabled services for manual review."""
     # This check is informational, so we don't score it.
-    print("[*] Checking enabled services...")
+    items = []
+    log.info("[*] Checking enabled services...")
     
-    services = run_command("systemctl list-unit-files --type=service --state=enabled | grep '.service'")
+    output = run_command([
+        "systemctl", "list-unit-files", "--type=service", "--state=enabled",
+        "--no-legend", "--no-pager"
+    ])
     
-    if services is not None:
-        report.append({
+    if output is not None:
+        # Keep only the unit lines, the same thing "| grep '.service'" did
+        services = "\n".join(line for line in output.splitlines() if ".service" in line)
+
+        items.append({
             "check": "Enabled Services",
             "status": "INFO",
             "message": "Review this list for any services you don't need.",
             "recommendation": f"Disable unneeded services with 'sudo systemctl disable <service_name>'.\nServices found:\n{services}"
         })
     else:
-        report.append({
+        items.append({
             "check": "Enabled Services",
             "status": "ERROR",
             "message": "Could not list enabled services.",
             "recommendation": "Check systemctl logs."
         })
 
-def check_cis_umask():
-    """CIS Benchmark 5.4.4 - Ensure default umask is 027 or more restrictive."""
-    global score, max_score
-    max_score += 1
-    print("[*] Checking CIS (Default umask)...")
-    
-    # Check in /etc/profile which is a common place
-    umask_setting = run_command("grep '^umask' /etc/profile || true")
-    
-    if "umask 027" in umask_setting or "umask 077" in umask_setting:
-        report.append({
-            "check": "CIS: Default Umask",
-            "status": "PASS",
-            "message": f"Umask setting found: {umask_setting}",
-            "recommendation": "None."
-        })
-        score += 1
-    else:
-        report.append({
-            "check": "CIS: Default Umask",
-            "status": "FAIL",
-            "message": f"Default umask is not set to 027 or 077. Found: {umask_setting}",
-            "recommendation": "Add or edit the 'umask 027' line in /etc/profile or /etc/bash.bashrc."
-        })
+    return items, (0, 0)
+
+def kill_process_group(proc):
+    """Kills a process started with start_new_session=True, with all its children."""
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass  # Already finished
+
+def stop_running_scans():
+    """Kills every rkhunter scan that is still running (e.g. on Ctrl-C)."""
+    for proc in list(running_scans):
+        kill_process_group(proc)
+
+def run_rkhunter_scan(timeout=RKHUNTER_TIMEOUT):
+    """
+    Runs 'rkhunter --check --rwo' and reads its output line by line as it
+    arrives, instead of buffering it all until the scan is done.
+    Returns (output_lines, has_warning), or None if the scan failed.
+    Raises subprocess.TimeoutExpired if it runs longer than 'timeout' seconds.
+    """
+    command = ["rkhunter", "--check", "--rwo"]
+    lines = []
+    has_warning = False
+    timed_out = threading.Event()
+    finished = threading.Event()
+    try:
+        # stderr goes into the same pipe so it can't fill up and block the scan.
+        # A new session lets us kill rkhunter together with its helper processes,
+        # but it also means Ctrl-C doesn't reach it, so main() stops it instead.
+        proc = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,  # Line buffered
+            start_new_session=True
+        )
+    except Exception as e:
+        log.error(f"Error running command '{' '.join(command)}': {e}")
+        return None
+
+    def kill_scan():
+        # The scan may have finished just before the timer fired
+        if proc.poll() is None:
+            timed_out.set()
+            kill_process_group(proc)
+
+    # Reading the pipe blocks, so a timer enforces the deadline.
+    # It's a daemon thread so it can't keep the tool alive after Ctrl-C.
+    timer = threading.Timer(timeout, kill_scan)
+    timer.daemon = True
+    timer.start()
+
+    # With '--rwo' rkhunter only prints warnings, so a clean scan is silent
+    # for minutes. Log a heartbeat on a timer instead of per output line.
+    def report_progress():
+        started = time.monotonic()
+        while not finished.wait(RKHUNTER_PROGRESS_INTERVAL):
+            elapsed = int(time.monotonic() - started)
+            log.info(f"    rkhunter still running ({elapsed}s elapsed)...")
+
+    threading.Thread(target=report_progress, daemon=True).start()
+    running_scans.add(proc)
+    try:
+        for line in proc.stdout:
+            lines.append(line.rstrip("\n"))
+            if not has_warning and "Warning:" in line:
+                has_warning = True
+    except BaseException:
+        # Don't leave the scan running if we're interrupted while reading
+        kill_process_group(proc)
+        raise
+    finally:
+        timer.cancel()
+        finished.set()
+        running_scans.discard(proc)
+        # Drain whatever is left in the pipe and reap the process (no zombies)
+        proc.communicate()
+
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(command, timeout, output="\n".join(lines))
+
+    # rkhunter exits non-zero when it finds warnings, which is not a failure
+    if proc.returncode != 0 and not has_warning:
+        log.warning(f"Warning: Command '{' '.join(command)}' failed: {' '.join(lines)}")
+        return None
+    return lines, has_warning
 
 def check_rootkits():
     """Checks for rootkits using 'rkhunter'."""
-    print("[*] Checking for rootkits (using rkhunter)...")
+    items = []
+    log.info("[*] Checking for rootkits (using rkhunter)...")
     
     # First, check if rkhunter is installed
-    if run_command("command -v rkhunter") is None:
-        report.append({
+    if shutil.which("rkhunter") is None:
+        items.append({
             "check": "Rootkit Scan",
             "status": "ERROR",
             "message": "rkhunter is not installed.",
             "recommendation": "Install rkhunter ('sudo apt install rkhunter') and run 'sudo rkhunter --update' then 'sudo rkhunter --check'."
         })
-        return
+        return items, (0, 0)
 
     # If it's installed, run the check.
     # '--check' runs the scan. '--rwo' (report warnings only) simplifies output.
-    print("    (This may take a minute or two...)")
-    scan_output = run_command("sudo rkhunter --check --rwo")
+    log.info("    (This may take a minute or two...)")
+    # We're already root (checked in main), so no 'sudo' needed here
+    try:
+        scan_result = run_rkhunter_scan()
+    except subprocess.TimeoutExpired as e:
+        items.append({
+            "check": "Rootkit Scan",
+            "status": "TIMEOUT",
+            "message": f"rkhunter scan did not finish within {e.timeout} seconds and was stopped.",
+            "recommendation": "Run 'sudo rkhunter --check' manually and let it complete."
+        })
+        return items, (0, 0)
     
-    if scan_output is None:
-        report.append({
+    if scan_result is None:
+        items.append({
             "check": "Rootkit Scan",
             "status": "ERROR",
             "message": "rkhunter scan failed to run.",
             "recommendation": "Run 'sudo rkhunter --check' manually to debug."
         })
-    elif "Warning:" in scan_output:
-        report.append({
+    elif scan_result[1]:
+        scan_output = "\n".join(scan_result[0])
+        items.append({
             "check": "Rootkit Scan",
             "status": "WARNING",
             "message": "rkhunter found warnings. This is common on new installs (e.g., file prop changes).",
             "recommendation": f"Run 'sudo rkhunter --check' manually to review. Warnings found:\n{scan_output}"
         })
     else:
-        report.append({
+        items.append({
             "check": "Rootkit Scan",
             "status": "PASS",
             "message": "rkhunter scan completed with no warnings.",
             "recommendation": "None."
         })
 
+    return items, (0, 0)
+
+# All audit checks, in the order they appear in the report.
+# Adding a pass/fail check only takes a new Check entry here.
+CHECKS = [
+    Check(
+        name="Firewall",
+        probe=lambda: get_unit_state("ufw"),
+        passes=lambda state: state == "active",
+        # Anything but active/inactive ('None', 'not-found', ...) is an error
+        is_error=lambda state: state not in ("active", "inactive"),
+        pass_msg="Firewall (ufw) is active.",
+        fail_msg="Firewall (ufw) is INACTIVE.",
+        fail_rec="Enable the firewall using 'sudo ufw enable'.",
+        error_msg="Could not determine ufw status. Is 'ufw' installed?",
+        error_rec="If this is not an Ubuntu/Debian system, you may need to check for 'firewalld'."
+    ),
+    Check(
+        name="SSH Root Login",
+        probe=get_ssh_root_login,
+        # Anything else is 'PermitRootLogin yes', 'prohibit-password', or commented out
+        passes=lambda config: config == "PermitRootLogin no",
+        pass_msg="PermitRootLogin is set to 'no'.",
+        fail_msg="PermitRootLogin is NOT securely set to 'no'. Found: '{value}'",
+        fail_rec="Edit /etc/ssh/sshd_config and set 'PermitRootLogin no' and restart the SSH service.",
+        error_msg=f"SSH config file not found at {SSHD_CONFIG}.",
+        error_rec="Ensure SSH server is installed correctly."
+    ),
+    permission_check("/etc/passwd", 0o644, {0o644}),
+    permission_check("/etc/shadow", 0o640, {0o640, 0o600, 0o400}), # Allow 640 (group read) or 600/400 (root only)
+    Check(
+        name="CIS: Default Umask",  # CIS Benchmark 5.4.4
+        probe=get_umask_settings,
+        # Every umask we found must be restrictive, otherwise a later line can weaken it
+        passes=lambda settings: bool(settings) and all(umask_is_restrictive(line) for line in settings),
+        pass_msg="Umask setting found: {value}",
+        fail_msg="Default umask is not set to 027 or more restrictive. Found: {value}",
+        fail_rec="Add or edit the 'umask 027' line in /etc/profile or /etc/bash.bashrc.",
+        is_error=lambda settings: False,  # No umask line at all is a FAIL
+        show=", ".join
+    ),
+    check_unused_services,  # Informational, not scored
+    check_rootkits,         # Informational, not scored
+]
+
 # --- Main Execution ---
 def main():
     """Main function to run all audit checks and print the report."""
-    
+
     # Check if running as root
     if os.geteuid() != 0:
         print("This script must be run as root to access all system files.")
@@ -267,33 +550,53 @@ def main():
     print("  Starting Simple Linux Security Audit Tool ")
     print("============================================")
     
-    # Run all our check functions
-    check_firewall()
-    check_ssh_config()
-    check_file_permissions()
-    check_cis_umask()
-    check_unused_services() # Informational, not scored
-    check_rootkits()        # Informational, not scored
+    # Run all our check functions in parallel. They spend almost all their
+    # time waiting on subprocesses, so threads are enough and the total time
+    # is roughly that of the slowest check (usually rkhunter).
+    # The checks only return their results; all merging happens here.
+    state = AuditState()
+    listener = setup_logging()
+    with ThreadPoolExecutor(max_workers=len(CHECKS)) as executor:
+        # map() yields results in CHECKS order, so the report stays stable between runs
+        try:
+            results = list(executor.map(run_check, CHECKS))
+        except KeyboardInterrupt:
+            # rkhunter runs in its own session and never sees Ctrl-C. Kill it
+            # so the executor isn't left waiting for the scan to finish.
+            stop_running_scans()
+            listener.stop()
+            raise
+
+    # Flush any queued progress messages before printing the report
+    listener.stop()
+
+    for items, (gained, possible) in results:
+        for item in items:
+            state.add_report(item)
+        state.add_score(gained, possible)
     
     print("\n\n============================================")
     print("           Audit Report Summary           ")
     print("============================================")
     
-    # Print the formatted report
-    for item in report:
-        print(f"\n--- Check: {item['check']} ---")
-        print(f"  [!] Status: {item['status']}")
-        print(f"  [+] Message: {item['message']}")
-        print(f"  [>] Action: {item['recommendation']}")
+    # Build the whole formatted report first, then write it out in one go
+    report_text = "\n".join(
+        f"\n--- Check: {item['check']} ---\n"
+        f"  [!] Status: {item['status']}\n"
+        f"  [+] Message: {item['message']}\n"
+        f"  [>] Action: {item['recommendation']}"
+        for item in state.report
+    )
+    sys.stdout.write(report_text + "\n")
 
     # Print the final score
     print("\n\n============================================")
     print("                 Final Score                ")
     print("============================================")
     
-    if max_score > 0:
-        final_score = (score / max_score) * 100
-        print(f"Your system compliance score is: {score}/{max_score} ({final_score:.2f}%)")
+    if state.max_score > 0:
+        final_score = (state.score / state.max_score) * 100
+        print(f"Your system compliance score is: {state.score}/{state.max_score} ({final_score:.2f}%)")
         print("NOTE: 'INFO' and 'WARNING' checks do not count towards the score.")
     else:
         print("No scorable checks were completed.")
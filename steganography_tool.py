@@ -35,9 +35,13 @@ def embed_message():
         # Convert message to bytes (stepic requires bytes)
         message_bytes = message.encode('utf-8')
 
+        # Read the pixel data once, up front (Pillow loads images lazily)
+        original_image.load()
+
         # Use stepic to embed the bytes into the image
-        # 'copy()' ensures the original image is not changed
-        stego_image = stepic.encode(original_image.copy(), message_bytes)
+        # stepic.encode returns a new image, and we don't use the original
+        # again, so there's no need to copy it first
+        stego_image = stepic.encode(original_image, message_bytes)
 
         # --- Ask user where to save the new file ---
 
@@ -69,6 +73,33 @@ def embed_message():
         messagebox.showerror("Error", f"An error occurred: {e}")
 
 
+def first_hidden_byte_is_plausible(image):
+    """
+    Sanity-checks whether an image could hold a message from this tool.
+    stepic has no length header: it stores each byte in the LSBs of 3 pixels,
+    so we decode just the first byte and check that it can start UTF-8 text.
+    This rejects some garbage results early; it isn't a speedup, since
+    stepic.decode already stops after a few bytes on most wrong images.
+    """
+    # Pixel formats stepic can't read; let stepic.decode report them
+    if image.mode not in ('RGB', 'RGBA', 'CMYK'):
+        return True
+
+    # decode_imdata yields one character per hidden byte
+    try:
+        first_byte = ord(next(stepic.decode_imdata(image.getdata())))
+    except (StopIteration, RuntimeError):
+        # Fewer than 3 pixels: too small to hold anything
+        return False
+
+    # Text from the message box: printable ASCII, tab/newline, or a UTF-8 lead byte
+    return (
+        first_byte in (0x09, 0x0A, 0x0D)
+        or 0x20 <= first_byte <= 0x7E
+        or 0xC2 <= first_byte <= 0xF4
+    )
+
+
 def extract_message():
     """
     Extracts a hidden message from a steganographic image.
@@ -84,6 +115,12 @@ def extract_message():
         # Open the image
         stego_image = Image.open(image_path)
 
+        # Reject images whose first hidden byte can't be the start of
+        # a message, instead of showing the garbage stepic would decode
+        if not first_hidden_byte_is_plausible(stego_image):
+            messagebox.showerror("Error", "No hidden message found. Is this the right image?")
+            return
+
         # Use stepic to decode the data
         decoded_data = stepic.decode(stego_image)
 
@@ -98,13 +135,14 @@ def extract_message():
 
         messagebox.showinfo("Success", "Message extracted and displayed in the text box.")
 
-    except Exception as e:
-        # This error often means no hidden message was found
-        messagebox.showerror("Error", f"Could not extract message. Is this the right image?\n\nDetails: {e}")
+    except RuntimeError as e:
+        # stepic raises this when it runs out of pixels without finding
+        # the end-of-message flag, i.e. the image doesn't hold a message
+        messagebox.showerror("Error", f"No hidden message found. Is this the right image?\n\nDetails: {e}")
 
     except Exception as e:
-        # This error often means no hidden message was found
-        messagebox.showerror("Error", f"Could not extract message. Is this the right image?\n\nDetails: {e}")
+        # Anything else, e.g. the file is missing or isn't an image
+        messagebox.showerror("Error", f"Could not extract message.\n\nDetails: {e}")
 
 
 def select_image():